@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, NamedTuple, Sequence, Union
 
 from lightbus.exceptions import (
     UnknownApi,
@@ -9,7 +9,7 @@ from lightbus.exceptions import (
 )
 
 
-__all__ = ["Api", "Event"]
+__all__ = ["Api", "Event", "cached", "hedged"]
 
 
 class ApiRegistry:
@@ -137,3 +137,61 @@ class Event:
                 f"tuple of parameter names."
             )
         self.parameters = parameters
+
+
+class RpcCacheOptions(NamedTuple):
+    ttl: float
+    invalidated_by: Sequence[str] = ()
+
+
+def cached(ttl: float, invalidated_by: Union[str, Sequence[str]] = ()):
+    """ Decorator. Allow callers to cache the results of the decorated RPC
+
+    Results will be cached by the calling bus client for `ttl` seconds, keyed
+    on the RPC's arguments. The cache will be cleared early if any of the events
+    named in `invalidated_by` are fired. These can either be the name of an
+    event on the same API (`user_updated`), or a fully qualified event
+    name (`company.auth.user_updated`).
+
+    Note that caching only happens where the calling bus client has
+    this API registered.
+
+        @cached(ttl=60, invalidated_by="user_updated")
+        def get_permissions(self, username):
+            ...
+    """
+    if isinstance(invalidated_by, str):
+        invalidated_by = [invalidated_by]
+
+    def decorator(fn):
+        fn.cache_options = RpcCacheOptions(ttl=ttl, invalidated_by=tuple(invalidated_by))
+        return fn
+
+    return decorator
+
+
+class RpcHedgeOptions(NamedTuple):
+    percentile: float = 95
+    delay: float = 0.1
+
+
+def hedged(percentile: float = 95, delay: float = 0.1):
+    """ Decorator. Allow callers to send duplicate calls to the decorated RPC
+
+    Should no result be received within the given `percentile` of this RPC's
+    recent response times, then the caller will send a duplicate call. The result
+    of whichever call completes first will be used. `delay` (in seconds) will be used
+    until sufficient response times have been recorded.
+
+    Only use this on idempotent RPCs, as both calls may well be executed.
+
+        @hedged(percentile=95)
+        def get_user(self, username):
+            ...
+    """
+
+    def decorator(fn):
+        fn.hedge_options = RpcHedgeOptions(percentile=percentile, delay=delay)
+        return fn
+
+    return decorator
@@ -3,14 +3,15 @@ import functools
 import inspect
 import logging
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from copy import deepcopy
 from datetime import timedelta
 from itertools import chain
-from typing import List, Tuple, Coroutine, Union, Sequence, TYPE_CHECKING, Callable
+from typing import List, Tuple, Coroutine, Union, Sequence, TYPE_CHECKING, Callable, Dict
 
 import janus
 
-from lightbus.api import Api, ApiRegistry
+from lightbus.api import Api, ApiRegistry, RpcCacheOptions, RpcHedgeOptions
 from lightbus.client_worker import (
     ClientWorker,
     run_in_worker_thread,
@@ -52,11 +53,13 @@ from lightbus.utilities.async_tools import (
     run_user_provided_callable,
 )
 from lightbus.utilities.casting import cast_to_signature
+from lightbus.utilities.deadlines import deadline_context, get_deadline
 from lightbus.utilities.deforming import deform_to_bus
 from lightbus.utilities.features import Feature, ALL_FEATURES
 from lightbus.utilities.frozendict import frozendict
 from lightbus.utilities.human import human_time
 from lightbus.utilities.logging import log_transport_information
+from lightbus.utilities.rpc_cache import RpcResultCache
 
 if TYPE_CHECKING:
     # pylint: disable=unused-import,cyclic-import
@@ -107,6 +110,15 @@ class BusClient:
         self._server_tasks = []
         self.worker = ClientWorker()
         self._lazy_load_complete = False
+        self.rpc_cache = RpcResultCache(max_size=self.config.bus().rpc_cache_size)
+        # Maps (api_name, event_name) -> set of (api_name, procedure_name) to invalidate
+        self._rpc_cache_invalidations: Dict[Tuple[str, str], set] = {}
+        # Calls currently in progress, used when coalescing RPC calls
+        self._rpc_calls_in_flight: Dict[tuple, asyncio.Future] = {}
+        # Recent response times of hedged RPCs, keyed by (api_name, procedure_name)
+        self._rpc_latencies: Dict[Tuple[str, str], deque] = defaultdict(
+            functools.partial(deque, maxlen=100)
+        )
 
         if plugins is None:
             logger.debug("Auto-loading any installed Lightbus plugins...")
@@ -463,15 +475,28 @@ class BusClient:
                 return
 
             for rpc_message in rpc_messages:
+                if rpc_message.expired:
+                    # The caller has already given up waiting, so don't waste effort on it
+                    logger.warning(
+                        L(
+                            "⌛  Dropping call to {} as its deadline passed {} ago",
+                            Bold(rpc_message.canonical_name),
+                            human_time(time.time() - rpc_message.deadline),
+                        )
+                    )
+                    continue
+
                 self._validate(rpc_message, "incoming")
 
                 await self._execute_hook("before_rpc_execution", rpc_message=rpc_message)
                 try:
-                    result = await self._call_rpc_local(
-                        api_name=rpc_message.api_name,
-                        name=rpc_message.procedure_name,
-                        kwargs=rpc_message.kwargs,
-                    )
+                    # Any RPCs called by the handler will inherit this call's deadline
+                    with deadline_context(rpc_message.deadline):
+                        result = await self._call_rpc_local(
+                            api_name=rpc_message.api_name,
+                            name=rpc_message.procedure_name,
+                            kwargs=rpc_message.kwargs,
+                        )
                 except SuddenDeathException:
                     # Used to simulate message failure for testing
                     return
@@ -507,20 +532,54 @@ class BusClient:
         """
         await self.lazy_load_now()
 
+        self._validate_name(api_name, "rpc", name)
+        kwargs = deform_to_bus(kwargs)
+        call_key = RpcResultCache.make_key(api_name, name, kwargs)
+
+        cache_options = self._get_rpc_option(api_name, name, "cache_options")
+        if cache_options:
+            try:
+                result = self.rpc_cache.get(call_key)
+            except KeyError:
+                pass
+            else:
+                logger.debug(f"Using cached result for RPC {api_name}.{name}")
+                return result
+
+        if self.config.api(api_name).coalesce_rpcs:
+            # Identical calls already in flight will share a single remote call
+            if call_key not in self._rpc_calls_in_flight:
+                future = asyncio.ensure_future(
+                    self._call_rpc_remote(api_name, name, kwargs, options)
+                )
+                self._rpc_calls_in_flight[call_key] = future
+                future.add_done_callback(lambda _: self._rpc_calls_in_flight.pop(call_key, None))
+            else:
+                logger.debug(f"Joining in-flight call to RPC {api_name}.{name}")
+
+            # Shield the shared call so that any one caller being cancelled
+            # will not cancel the call for the others.
+            result = await asyncio.shield(self._rpc_calls_in_flight[call_key])
+            # Callers must not be able to modify each other's results
+            result = deepcopy(result)
+        else:
+            result = await self._call_rpc_remote(api_name, name, kwargs, options)
+
+        if cache_options:
+            self._setup_rpc_cache_invalidation(api_name, name, cache_options)
+            self.rpc_cache.set(call_key, result, ttl=cache_options.ttl)
+
+        return result
+
+    async def _call_rpc_remote(self, api_name: str, name: str, kwargs: dict, options: dict):
+        """Send the RPC call and wait for the result
+
+        `kwargs` should already have been deformed.
+        """
         rpc_transport = self.transport_registry.get_rpc_transport(api_name)
-        result_transport = self.transport_registry.get_result_transport(api_name)
 
-        kwargs = deform_to_bus(kwargs)
-        rpc_message = RpcMessage(api_name=api_name, procedure_name=name, kwargs=kwargs)
-        return_path = result_transport.get_return_path(rpc_message)
-        rpc_message.return_path = return_path
         options = options or {}
-        timeout = options.get("timeout", self.config.api(api_name).rpc_timeout)
-        # TODO: rpc_timeout is in three different places in the config!
-        #       Fix this. Really it makes most sense for the use if it goes on the
-        #       ApiConfig rather than having to repeat it on both the result & RPC
-        #       transports.
-        self._validate_name(api_name, "rpc", name)
+        rpc_message, timeout = self._make_rpc_message(api_name, name, kwargs, options)
 
         logger.info("📞  Calling remote RPC {}.{}".format(Bold(api_name), Bold(name)))
 
@@ -528,13 +587,22 @@ class BusClient:
         # TODO: It is possible that the RPC will be called before we start waiting for the
         #       response. This is bad.
 
-        self._validate(rpc_message, "outgoing")
-
         future = asyncio.gather(
-            self.receive_result(rpc_message, return_path, options=options),
+            self.receive_result(rpc_message, rpc_message.return_path, options=options),
             rpc_transport.call_rpc(rpc_message, options=options, bus_client=self),
         )
 
+        hedge_options = self._get_rpc_option(api_name, name, "hedge_options")
+        if hedge_options:
+            future = asyncio.ensure_future(
+                self._hedge_rpc(
+                    future,
+                    rpc_message,
+                    options=options,
+                    delay=self._get_hedge_delay(api_name, name, hedge_options),
+                )
+            )
+
         await self._execute_hook("before_rpc_call", rpc_message=rpc_message)
 
         try:
@@ -548,15 +616,190 @@ class BusClient:
             except asyncio.CancelledError:
                 pass
 
-            # TODO: Remove RPC from queue. Perhaps add a RpcBackend.cancel() method. Optional,
-            #       as not all backends will support it. No point processing calls which have timed out.
+            await self._cancel_rpc(rpc_message, options)
+            raise self._make_rpc_timeout_error(rpc_message, timeout) from None
+
+        if hedge_options:
+            self._rpc_latencies[(api_name, name)].append(time.time() - start_time)
+
+        return await self._handle_rpc_result(rpc_message, result_message, start_time)
+
+    async def _hedge_rpc(
+        self, future: asyncio.Future, rpc_message: RpcMessage, options: dict, delay: float
+    ):
+        """Send a duplicate call should the given call not complete within `delay` seconds
+
+        The duplicate has the same ID as the original message, and therefore shares
+        its return path. Whichever result is received first will therefore be used.
+        """
+        done, _ = await asyncio.wait([future], timeout=delay)
+        if done:
+            return await future
+
+        logger.info(
+            L(
+                "🔁  No result for {} after {}, sending duplicate call",
+                Bold(rpc_message.canonical_name),
+                human_time(delay),
+            )
+        )
+        rpc_transport = self.transport_registry.get_rpc_transport(rpc_message.api_name)
+        try:
+            await rpc_transport.call_rpc(rpc_message, options=options, bus_client=self)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            # We can still receive the result of the original call, so carry on
+            logger.warning(f"Failed to send duplicate call for {rpc_message}: {e}")
+
+        result = await future
+        # One of the two calls may well still be queued, in which case remove it
+        await self._cancel_rpc(rpc_message, options)
+        return result
+
+    def _get_hedge_delay(self, api_name: str, name: str, hedge_options: RpcHedgeOptions):
+        """Get how long to wait before sending a duplicate call to the given RPC"""
+        latencies = sorted(self._rpc_latencies.get((api_name, name), ()))
+        if len(latencies) < 20:
+            # Not enough data to go on
+            return hedge_options.delay
+        index = min(int(len(latencies) * hedge_options.percentile / 100), len(latencies) - 1)
+        return latencies[index]
+
+    @run_in_worker_thread()
+    async def call_rpcs_remote(
+        self, calls: Sequence[Tuple[str, str, dict]], options: dict = frozendict()
+    ) -> list:
+        """ Perform multiple RPC calls at once
+
+        `calls` is in the form:
+
+            calls=[
+                ('company.first_api', 'rpc_name', {'arg': 'value'}),
+                ('company.second_api', 'rpc_name', {'arg': 'value'}),
+            ]
+
+        The calls will be sent together (where supported by the transport), and
+        the results will be returned in the same order as `calls`. Should a call
+        fail, then the exception will be returned in place of its result.
+
+        Note that calls made in this way will not make use of result caching
+        or call coalescing.
+        """
+        await self.lazy_load_now()
+
+        options = options or {}
+        rpc_messages = []
+        timeouts = []
+        for api_name, name, kwargs in calls:
+            self._validate_name(api_name, "rpc", name)
+            rpc_message, timeout = self._make_rpc_message(
+                api_name, name, deform_to_bus(kwargs), options
+            )
+            rpc_messages.append(rpc_message)
+            timeouts.append(timeout)
+
+        # Calls for APIs which share a transport will be sent together
+        messages_by_transport = defaultdict(list)
+        for rpc_message in rpc_messages:
+            rpc_transport = self.transport_registry.get_rpc_transport(rpc_message.api_name)
+            messages_by_transport[rpc_transport].append(rpc_message)
+
+        logger.info(
+            LBullets(
+                "📞  Calling {} remote RPCs".format(len(rpc_messages)),
+                items=[rpc_message.canonical_name for rpc_message in rpc_messages],
+            )
+        )
+
+        start_time = time.time()
+        receive_tasks = [
+            asyncio.ensure_future(
+                self._receive_rpc_result(rpc_message, timeout, options, start_time)
+            )
+            for rpc_message, timeout in zip(rpc_messages, timeouts)
+        ]
+
+        try:
+            for rpc_message in rpc_messages:
+                await self._execute_hook("before_rpc_call", rpc_message=rpc_message)
+
+            await asyncio.gather(
+                *[
+                    rpc_transport.call_rpcs(transport_messages, options=options, bus_client=self)
+                    for rpc_transport, transport_messages in messages_by_transport.items()
+                ]
+            )
+        except Exception:
+            await cancel(*receive_tasks)
+            raise
+
+        return await asyncio.gather(*receive_tasks, return_exceptions=True)
+
+    async def _receive_rpc_result(
+        self, rpc_message: RpcMessage, timeout: float, options: dict, start_time: float
+    ):
+        """Wait for the result of an RPC which has already been sent"""
+        try:
+            result_message = await asyncio.wait_for(
+                self.receive_result(rpc_message, rpc_message.return_path, options=options),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            await self._cancel_rpc(rpc_message, options)
+            raise self._make_rpc_timeout_error(rpc_message, timeout) from None
+
+        return await self._handle_rpc_result(rpc_message, result_message, start_time)
+
+    async def _cancel_rpc(self, rpc_message: RpcMessage, options: dict):
+        """Cancel a call we are no longer waiting on, so it need not be processed"""
+        rpc_transport = self.transport_registry.get_rpc_transport(rpc_message.api_name)
+        try:
+            await rpc_transport.cancel_rpc(rpc_message, options=options, bus_client=self)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            # Cancelling is only an optimisation, so don't let it cause problems
+            logger.warning(f"Failed to cancel call {rpc_message}: {e}")
+
+    def _make_rpc_message(
+        self, api_name: str, name: str, kwargs: dict, options: dict
+    ) -> Tuple[RpcMessage, float]:
+        """Create an outgoing RPC message, along with the timeout to use when calling it"""
+        result_transport = self.transport_registry.get_result_transport(api_name)
+
+        timeout = options.get("timeout", self.config.api(api_name).rpc_timeout)
+        # The deadline travels with the message so the worker can drop the call once we
+        # have given up on it. It will be brought forward if we are ourselves executing
+        # an RPC which has a sooner deadline.
+        deadline = get_deadline(timeout)
+        timeout = deadline - time.time()
+        if timeout <= 0:
             raise LightbusTimeout(
-                f"Timeout when calling RPC {rpc_message.canonical_name} after {timeout} seconds. "
-                f"It is possible no Lightbus process is serving this API, or perhaps it is taking "
-                f"too long to process the request. In which case consider raising the 'rpc_timeout' "
-                f"config option."
-            ) from None
+                f"Not calling RPC {api_name}.{name} as the deadline of the RPC currently being "
+                f"executed has already passed."
+            )
 
+        rpc_message = RpcMessage(
+            api_name=api_name, procedure_name=name, kwargs=kwargs, deadline=deadline
+        )
+        rpc_message.return_path = result_transport.get_return_path(rpc_message)
+
+        self._validate(rpc_message, "outgoing")
+        return rpc_message, timeout
+
+    def _make_rpc_timeout_error(self, rpc_message: RpcMessage, timeout: float) -> LightbusTimeout:
+        return LightbusTimeout(
+            f"Timeout when calling RPC {rpc_message.canonical_name} after {timeout} seconds. "
+            f"It is possible no Lightbus process is serving this API, or perhaps it is taking "
+            f"too long to process the request. In which case consider raising the 'rpc_timeout' "
+            f"config option."
+        )
+
+    async def _handle_rpc_result(
+        self, rpc_message: RpcMessage, result_message: ResultMessage, start_time: float
+    ):
+        """Log & validate the result of a remote call, raising an error should the call have failed"""
         await self._execute_hook(
             "after_rpc_call", rpc_message=rpc_message, result_message=result_message
         )
@@ -584,10 +827,61 @@ class BusClient:
                 )
             )
 
-        self._validate(result_message, "incoming", api_name, procedure_name=name)
+        self._validate(
+            result_message,
+            "incoming",
+            rpc_message.api_name,
+            procedure_name=rpc_message.procedure_name,
+        )
 
         return result_message.result
 
+    def _get_rpc_option(self, api_name: str, name: str, option_name: str):
+        """Get an option set upon the given RPC by a decorator, such as @cached() or @hedged()
+
+        Will return None if the option is not set. Note that this requires
+        the API to be available in the local API registry.
+        """
+        try:
+            api = self.api_registry.get(api_name)
+        except UnknownApi:
+            return None
+        return getattr(getattr(api, name, None), option_name, None)
+
+    def _setup_rpc_cache_invalidation(
+        self, api_name: str, name: str, cache_options: RpcCacheOptions
+    ):
+        """Listen for the events which should clear the given RPC's cached results"""
+        for event in cache_options.invalidated_by:
+            if "." in event:
+                event_api_name, event_name = event.rsplit(".", 1)
+            else:
+                event_api_name, event_name = api_name, event
+
+            event_key = (event_api_name, event_name)
+            if event_key in self._rpc_cache_invalidations:
+                self._rpc_cache_invalidations[event_key].add((api_name, name))
+                continue
+
+            self._rpc_cache_invalidations[event_key] = {(api_name, name)}
+
+            async def invalidate(event_message, **kwargs):
+                key = (event_message.api_name, event_message.event_name)
+                for procedure in self._rpc_cache_invalidations.get(key, ()):
+                    self.rpc_cache.invalidate(*procedure)
+
+            # Every process must see every event, so each gets its own consumer group
+            event_listener = _EventListener(
+                events=[event_key],
+                listener_callable=invalidate,
+                listener_name=(
+                    f"rpc_cache_invalidation_{self.config.process_name}_"
+                    f"{event_api_name}_{event_name}"
+                ),
+                bus_client=self,
+            )
+            event_listener.start_task(self)
+
     @run_in_worker_thread()
     async def _call_rpc_local(self, api_name: str, name: str, kwargs: dict = frozendict()):
         await self.lazy_load_now()
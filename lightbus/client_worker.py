@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 import inspect
 import logging
 import queue
@@ -83,8 +84,9 @@ def run_in_worker_thread(worker=None):
             # We'll provide a queue as the return path for results
             result_queue = queue.Queue()
 
-            # Enqueue the function, it's arguments, and our return path queue
-            worker_._call_queue.sync_q.put((fn, args, kwargs, current_frame, result_queue))
+            # Enqueue the function, it's arguments, our context, and our return path queue
+            context = contextvars.copy_context()
+            worker_._call_queue.sync_q.put((fn, args, kwargs, context, current_frame, result_queue))
 
             # Wait for a return value on the result queue
             logger.debug("Awaiting execution completion")
@@ -358,16 +360,26 @@ class ClientWorker:
         while True:
             # Wait for calls
             logger.debug("Awaiting calls on the call queue")
-            fn, args, kwargs, current_frame, result_queue = await self._call_queue.async_q.get()
+            (
+                fn,
+                args,
+                kwargs,
+                context,
+                current_frame,
+                result_queue,
+            ) = await self._call_queue.async_q.get()
 
             self._current_frame = current_frame
 
             # Execute call
             logger.debug(f"Call to {fn.__name__} received, executing")
             try:
-                result = fn(*args, **kwargs)
+                # Execute within the caller's context, so any context variables
+                # set in the calling thread are also available here
+                result = context.run(fn, *args, **kwargs)
                 if inspect.isawaitable(result):
-                    result = await result
+                    # Tasks take a copy of the current context upon creation
+                    result = await context.run(asyncio.ensure_future, result)
             except asyncio.CancelledError as e:
                 raise
             except Exception as e:
@@ -104,6 +104,8 @@ class ApiConfig:
     #: Cast values before calling event listeners and RPCs
     cast_values: bool = True
     on_error: OnError = OnError.SHUTDOWN
+    #: Share a single remote call between identical concurrent RPC calls
+    coalesce_rpcs: bool = False
 
     def __init__(self, **kw):
         for k, v in kw.items():
@@ -134,6 +136,8 @@ class SchemaConfig(NamedTuple):
 class BusConfig(NamedTuple):
     log_level: LogLevelEnum = LogLevelEnum.INFO
     schema: SchemaConfig = SchemaConfig()
+    #: Maximum number of RPC results to hold in the client-side cache
+    rpc_cache_size: int = 1000
 
 
 class RootConfig:
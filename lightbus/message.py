@@ -1,3 +1,4 @@
+import time
 import traceback
 from typing import Optional, Dict, Any, Sequence
 from uuid import uuid1
@@ -50,6 +51,7 @@ class RpcMessage(Message):
         procedure_name: str,
         kwargs: Optional[dict] = None,
         return_path: Any = None,
+        deadline: Optional[float] = None,
         id: str = "",
         native_id: str = None,
     ):
@@ -58,6 +60,8 @@ class RpcMessage(Message):
         self.procedure_name = procedure_name
         self.kwargs = kwargs
         self.return_path = return_path
+        # Absolute unix timestamp after which the caller will have given up waiting
+        self.deadline = float(deadline) if deadline else None
 
     def __repr__(self):
         return "<{}: {}>".format(self.__class__.__name__, self)
@@ -71,13 +75,24 @@ class RpcMessage(Message):
     def canonical_name(self):
         return "{}.{}".format(self.api_name, self.procedure_name)
 
+    @property
+    def expired(self) -> bool:
+        """Has the deadline for this call passed?
+
+        Messages without a deadline never expire
+        """
+        return self.deadline is not None and time.time() > self.deadline
+
     def get_metadata(self) -> dict:
-        return {
+        metadata = {
             "id": self.id,
             "api_name": self.api_name,
             "procedure_name": self.procedure_name,
             "return_path": self.return_path or "",
         }
+        if self.deadline is not None:
+            metadata["deadline"] = self.deadline
+        return metadata
 
     def get_kwargs(self):
         return self.kwargs
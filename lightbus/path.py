@@ -1,4 +1,4 @@
-from typing import Optional, TYPE_CHECKING, Any, Generator
+from typing import Optional, TYPE_CHECKING, Any, Generator, Sequence
 
 from lightbus.exceptions import InvalidBusPathConfiguration, InvalidParameters
 from lightbus.utilities.async_tools import block
@@ -100,6 +100,29 @@ class BusPath:
             api_name=self.api_name, name=self.name, kwargs=kwargs, options=bus_options
         )
 
+    def call_many(self, kwargs_list: Sequence[dict], *, bus_options: dict = None) -> list:
+        """Call this BusPath node as an RPC, once for each of the given sets of arguments
+
+        The calls will be sent together, and the results returned in the same order
+        as `kwargs_list`. Should a call fail, then the exception will be returned in place
+        of its result. For example:
+
+            bus.auth.get_user.call_many([{"username": "adam"}, {"username": "sally"}])
+        """
+        rpc_timeout = self.client.config.api(self.api_name).rpc_timeout * 1.5
+        return block(
+            self.call_many_async(kwargs_list, bus_options=bus_options), timeout=rpc_timeout
+        )
+
+    async def call_many_async(self, kwargs_list: Sequence[dict], *, bus_options: dict = None):
+        """Call this BusPath node as an RPC, once for each of the given sets of arguments
+        (asynchronous)
+        """
+        return await self.client.call_rpcs_remote(
+            calls=[(self.api_name, self.name, kwargs) for kwargs in kwargs_list],
+            options=bus_options,
+        )
+
     # Events
 
     def listen(self, listener, *, listener_name: str, bus_options: dict = None):
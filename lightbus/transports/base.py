@@ -68,6 +68,25 @@ class RpcTransport(Transport):
         """Publish a call to a remote procedure"""
         raise NotImplementedError()
 
+    async def call_rpcs(
+        self, rpc_messages: Sequence[RpcMessage], options: dict, bus_client: "BusClient"
+    ):
+        """Publish calls to multiple remote procedures
+
+        Transports may override this in order to send the calls more efficiently
+        """
+        for rpc_message in rpc_messages:
+            await self.call_rpc(rpc_message, options=options, bus_client=bus_client)
+
+    async def cancel_rpc(self, rpc_message: RpcMessage, options: dict, bus_client: "BusClient"):
+        """Cancel a call which the caller is no longer waiting upon
+
+        Called when the caller has given up on the call (i.e. it timed out). Transports may
+        implement this in order to prevent consumers from processing calls needlessly,
+        but there is no guarantee the call has not already been consumed.
+        """
+        pass
+
     async def consume_rpcs(
         self, apis: Sequence[Api], bus_client: "BusClient"
     ) -> Sequence[RpcMessage]:
@@ -1,13 +1,16 @@
 import asyncio
 import logging
+import random
 import time
-from typing import Mapping, Sequence, TYPE_CHECKING
+from collections import defaultdict
+from enum import Enum
+from typing import Mapping, Sequence, TYPE_CHECKING, Dict, List
 
 from aioredis import PipelineError, ConnectionClosedError
 from aioredis.util import decode
 
 from lightbus.transports.base import RpcTransport, RpcMessage, Api
-from lightbus.exceptions import TransportIsClosed
+from lightbus.exceptions import TransportIsClosed, UnsupportedOptionValue
 from lightbus.log import LBullets, L, Bold
 from lightbus.serializers import BlobMessageSerializer, BlobMessageDeserializer
 from lightbus.transports.redis.utilities import RedisTransportMixin
@@ -22,6 +25,21 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("lightbus.transports.redis")
 
+# Available call priorities, highest first
+PRIORITIES = ("high", "normal", "low")
+
+
+class PriorityOrder(Enum):
+    STRICT = "strict"
+    WEIGHTED = "weighted"
+
+    def __eq__(self, other):
+        # pylint: disable=comparison-with-callable
+        if isinstance(other, str):
+            return self.value == other
+        else:
+            return super().__eq__(other)
+
 
 class RedisRpcTransport(RedisTransportMixin, RpcTransport):
     """ Redis RPC transport providing at-most-once delivery
@@ -29,10 +47,18 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
     This transport uses a redis list and a blocking pop operation
     to distribute an RPC call to a single RPC consumer.
 
-    Each call also has a corresponding expiry key created. Once the
-    key expires it should be assumed that the RPC call has timed
+    Each call carries an absolute deadline in its metadata. Once the
+    deadline has passed it should be assumed that the RPC call has timed
     out and that therefore is should be discarded rather than
     be processed.
+
+    Calls sent without a deadline (i.e. by older clients) instead have a
+    corresponding expiry key created, the absence of which indicates
+    the call has timed out.
+
+    Calls may be given a priority of high, normal or low, using the `priority`
+    option. Each priority has its own list, and consumers will serve
+    higher priority lists first (see PriorityOrder).
     """
 
     def __init__(
@@ -47,6 +73,9 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
         rpc_timeout=5,
         rpc_retry_delay=1,
         consumption_restart_delay=5,
+        remove_cancelled_rpcs=True,
+        priority_order: PriorityOrder = PriorityOrder.STRICT,
+        priority_weights: Mapping[str, int] = frozendict(high=6, normal=3, low=1),
     ):
         self.set_redis_pool(redis_pool, url, connection_parameters)
         self._latest_ids = {}
@@ -56,6 +85,9 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
         self.rpc_timeout = rpc_timeout
         self.rpc_retry_delay = rpc_retry_delay
         self.consumption_restart_delay = consumption_restart_delay
+        self.remove_cancelled_rpcs = remove_cancelled_rpcs
+        self.priority_order = priority_order
+        self.priority_weights = priority_weights
 
     @classmethod
     def from_config(
@@ -69,9 +101,14 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
         rpc_timeout: int = 5,
         rpc_retry_delay: int = 1,
         consumption_restart_delay: int = 5,
+        remove_cancelled_rpcs: bool = True,
+        priority_order: PriorityOrder = PriorityOrder.STRICT,
+        priority_weights: Mapping[str, int] = frozendict(high=6, normal=3, low=1),
     ):
         serializer = import_from_string(serializer)()
         deserializer = import_from_string(deserializer)(RpcMessage)
+        if isinstance(priority_order, str):
+            priority_order = PriorityOrder[priority_order.upper()]
 
         return cls(
             url=url,
@@ -81,6 +118,9 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
             batch_size=batch_size,
             rpc_timeout=rpc_timeout,
             consumption_restart_delay=consumption_restart_delay,
+            remove_cancelled_rpcs=remove_cancelled_rpcs,
+            priority_order=priority_order,
+            priority_weights=priority_weights,
         )
 
     async def call_rpc(self, rpc_message: RpcMessage, options: dict, bus_client: "BusClient"):
@@ -88,7 +128,7 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
 
         This only sends the request, it does not await any result (see RedisResultTransport)
         """
-        queue_key = f"{rpc_message.api_name}:rpc_queue"
+        queue_key = self._get_queue_key(rpc_message.api_name, options)
         expiry_key = f"rpc_expiry_key:{rpc_message.id}"
         logger.debug(
             LBullets(
@@ -120,6 +160,11 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
 
     async def _call_rpc(self, rpc_message: RpcMessage, queue_key, expiry_key):
         with await self.connection_manager() as redis:
+            if rpc_message.deadline is not None:
+                # The deadline travels within the message itself, so no expiry key is needed
+                await redis.rpush(key=queue_key, value=self.serializer(rpc_message))
+                return
+
             p = redis.pipeline()
             p.rpush(key=queue_key, value=self.serializer(rpc_message))
             p.set(expiry_key, 1)
@@ -130,6 +175,71 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
             p.expire(expiry_key, timeout=self.rpc_timeout)
             await p.execute()
 
+    async def call_rpcs(
+        self, rpc_messages: Sequence[RpcMessage], options: dict, bus_client: "BusClient"
+    ):
+        """Emit calls to multiple remote procedures using a single pipeline
+
+        Calls destined for the same queue will be pushed using a single RPUSH.
+        """
+        messages_by_queue = defaultdict(list)
+        for rpc_message in rpc_messages:
+            queue_key = self._get_queue_key(rpc_message.api_name, options)
+            messages_by_queue[queue_key].append(rpc_message)
+
+        logger.debug(
+            LBullets(
+                L("Enqueuing {} messages in Redis", Bold(len(rpc_messages))),
+                items={
+                    queue_key: ", ".join(str(m) for m in queue_messages)
+                    for queue_key, queue_messages in messages_by_queue.items()
+                },
+            )
+        )
+
+        for try_number in range(3, 0, -1):
+            last_try = try_number == 1
+            try:
+                await self._call_rpcs(messages_by_queue)
+                return
+            except (PipelineError, ConnectionClosedError, ConnectionResetError):
+                if not last_try:
+                    await asyncio.sleep(self.rpc_retry_delay)
+                else:
+                    raise
+
+    async def _call_rpcs(self, messages_by_queue: Mapping[str, Sequence[RpcMessage]]):
+        with await self.connection_manager() as redis:
+            p = redis.pipeline()
+            for queue_key, rpc_messages in messages_by_queue.items():
+                p.rpush(queue_key, *[self.serializer(rpc_message) for rpc_message in rpc_messages])
+                for rpc_message in rpc_messages:
+                    if rpc_message.deadline is None:
+                        expiry_key = f"rpc_expiry_key:{rpc_message.id}"
+                        p.set(expiry_key, 1)
+                        p.expire(expiry_key, timeout=self.rpc_timeout)
+            await p.execute()
+
+    async def cancel_rpc(self, rpc_message: RpcMessage, options: dict, bus_client: "BusClient"):
+        """Cancel a call to a remote procedure
+
+        Deletes the call's expiry key (if any), thereby ensuring the call will not
+        be processed. If `remove_cancelled_rpcs` is enabled then the call will also be removed
+        from the queue, thereby saving consumers the effort of receiving it.
+        """
+        queue_key = self._get_queue_key(rpc_message.api_name, options)
+        expiry_key = f"rpc_expiry_key:{rpc_message.id}"
+
+        with await self.connection_manager() as redis:
+            p = redis.pipeline()
+            p.delete(expiry_key)
+            if self.remove_cancelled_rpcs:
+                # Serialisation is deterministic, so this will match the enqueued value
+                p.lrem(queue_key, 1, self.serializer(rpc_message))
+            await p.execute()
+
+        logger.debug(L("Cancelled call {} in Redis list {}", Bold(rpc_message), Bold(queue_key)))
+
     async def consume_rpcs(
         self, apis: Sequence[Api], bus_client: "BusClient"
     ) -> Sequence[RpcMessage]:
@@ -151,8 +261,13 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
                 await asyncio.sleep(self.consumption_restart_delay)
 
     async def _consume_rpcs(self, apis: Sequence[Api]) -> Sequence[RpcMessage]:
-        # Get the name of each list queue
-        queue_keys = ["{}:rpc_queue".format(api.meta.name) for api in apis]
+        # Get the name of each list queue. BLPOP will pop from the first non-empty
+        # list, so order the lists by priority
+        queue_keys = [
+            self._get_queue_key(api.meta.name, {"priority": priority})
+            for priority in self._get_priority_order()
+            for api in apis
+        ]
 
         logger.debug(
             LBullets(
@@ -174,11 +289,18 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
 
             stream = decode(stream, "utf8")
             rpc_message = self.deserializer(data)
-            expiry_key = f"rpc_expiry_key:{rpc_message.id}"
-            key_deleted = await redis.delete(expiry_key)
 
-            if not key_deleted:
-                return []
+            if rpc_message.expired:
+                return await self._skip_expired_rpcs(redis, stream)
+
+            if rpc_message.deadline is None:
+                # No deadline was provided, so fall back to checking the expiry key.
+                # Calls with a deadline will be checked for expiry by the bus client.
+                expiry_key = f"rpc_expiry_key:{rpc_message.id}"
+                key_deleted = await redis.delete(expiry_key)
+
+                if not key_deleted:
+                    return []
 
             logger.debug(
                 LBullets(
@@ -188,3 +310,75 @@ class RedisRpcTransport(RedisTransportMixin, RpcTransport):
             )
 
             return [rpc_message]
+
+    async def _skip_expired_rpcs(self, redis, queue_key) -> Sequence[RpcMessage]:
+        """Pop calls in bulk after receiving one which has expired
+
+        An expired call probably means we are working through a backlog of calls
+        which have all timed out. So rather than pop each individually, pop up to
+        `batch_size` calls at once and discard those which have expired.
+        """
+        p = redis.multi_exec()
+        p.lrange(queue_key, 0, self.batch_size - 1)
+        p.ltrim(queue_key, self.batch_size, -1)
+        values, _ = await p.execute()
+
+        rpc_messages = [self.deserializer(value) for value in values]
+        live_messages = [m for m in rpc_messages if not m.expired]
+        logger.debug(
+            f"Skipped {len(rpc_messages) - len(live_messages) + 1} expired RPC messages "
+            f"in Redis list {queue_key}"
+        )
+
+        legacy_messages = [m for m in live_messages if m.deadline is None]
+        if legacy_messages:
+            # Only keep calls without a deadline if their expiry key is still present
+            p = redis.pipeline()
+            for rpc_message in legacy_messages:
+                p.delete(f"rpc_expiry_key:{rpc_message.id}")
+            keys_deleted = dict(zip(legacy_messages, await p.execute()))
+            live_messages = [m for m in live_messages if keys_deleted.get(m, 1)]
+
+        return live_messages
+
+    async def get_queue_depths(self, api_names: Sequence[str]) -> Dict[str, Dict[str, int]]:
+        """Get the number of calls queued for each API, for each priority"""
+        with await self.connection_manager() as redis:
+            p = redis.pipeline()
+            for api_name in api_names:
+                for priority in PRIORITIES:
+                    p.llen(self._get_queue_key(api_name, {"priority": priority}))
+            lengths = iter(await p.execute())
+
+        return {
+            api_name: {priority: next(lengths) for priority in PRIORITIES} for api_name in api_names
+        }
+
+    def _get_queue_key(self, api_name: str, options: dict) -> str:
+        """Get the name of the list for calls to the given API at the priority given in `options`"""
+        priority = (options or {}).get("priority", "normal")
+        if priority not in PRIORITIES:
+            raise UnsupportedOptionValue(
+                f"Unsupported RPC priority '{priority}'. Priority must be one "
+                f"of: {', '.join(PRIORITIES)}"
+            )
+
+        if priority == "normal":
+            # Normal priority calls use the same list as before priorities were introduced
+            return f"{api_name}:rpc_queue"
+        else:
+            return f"{api_name}:rpc_queue:{priority}"
+
+    def _get_priority_order(self) -> List[str]:
+        """Get the order in which the priority lists should be consumed from
+
+        Strict ordering will always serve higher priority calls first. Weighted
+        ordering will randomly pick which priority to serve first (according to
+        `priority_weights`), thereby ensuring lower priority calls are not starved.
+        """
+        if self.priority_order == PriorityOrder.STRICT:
+            return list(PRIORITIES)
+
+        weights = [self.priority_weights.get(priority, 0) for priority in PRIORITIES]
+        first = random.choices(PRIORITIES, weights=weights)[0]  # nosec
+        return [first] + [priority for priority in PRIORITIES if priority != first]
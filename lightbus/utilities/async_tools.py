@@ -1,5 +1,6 @@
 import sys
 import asyncio
+import contextvars
 import logging
 import threading
 import traceback
@@ -154,9 +155,12 @@ async def run_user_provided_callable(
     if asyncio.iscoroutinefunction(callable_):
         return await callable_(*args, **kwargs)
 
+    # Run within a copy of the current context so that context variables (such as
+    # the current RPC deadline) remain available within the executor thread
+    context = contextvars.copy_context()
     with exception_handling_context(bus_client, die=die_on_exception):
         future = asyncio.get_event_loop().run_in_executor(
-            executor=None, func=lambda: callable_(*args, **kwargs)
+            executor=None, func=lambda: context.run(callable_, *args, **kwargs)
         )
     return await future
 
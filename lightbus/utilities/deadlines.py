@@ -0,0 +1,39 @@
+""" Propagation of RPC deadlines to nested RPC calls
+
+While an incoming RPC is being executed its deadline is stored in a context
+variable. Any RPCs called by the handler will then be given whatever time
+remains, rather than a fresh timeout. See BusClient.call_rpc_remote().
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_current_deadline: ContextVar[Optional[float]] = ContextVar("lightbus_deadline", default=None)
+
+
+def get_current_deadline() -> Optional[float]:
+    """Get the deadline of the RPC currently being executed (if any)"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_context(deadline: Optional[float]):
+    """Set the deadline inherited by any RPCs called within this context"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_deadline(timeout: float) -> float:
+    """Get the absolute deadline for a call made now with the given timeout
+
+    The inherited deadline (if any) will be used if it is sooner.
+    """
+    deadline = time.time() + timeout
+    inherited_deadline = get_current_deadline()
+    if inherited_deadline is not None:
+        deadline = min(deadline, inherited_deadline)
+    return deadline
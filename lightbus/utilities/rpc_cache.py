@@ -0,0 +1,66 @@
+""" Client-side caching of RPC results
+
+Results are only cached for RPCs which have opted-in using the
+`@cached()` decorator. See BusClient.call_rpc_remote().
+"""
+import json
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Tuple, Any
+
+
+class RpcResultCache:
+    """A bounded in-process LRU cache of RPC results
+
+    Entries are keyed on the API name, procedure name, and the
+    (already deformed) RPC arguments. Cache misses raise a `KeyError`,
+    as a `None` result is perfectly valid.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(api_name: str, procedure_name: str, kwargs: dict) -> tuple:
+        # Sort the keys so the same arguments always produce the same key
+        canonical_kwargs = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+        return api_name, procedure_name, canonical_kwargs
+
+    def get(self, key: tuple):
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        if expires_at < time.time():
+            del self._entries[key]
+            self.misses += 1
+            raise KeyError(key)
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Copy the value, lest the caller modify our cached copy
+        return deepcopy(value)
+
+    def set(self, key: tuple, value, ttl: float):
+        self._entries[key] = (time.time() + ttl, deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_name: str, procedure_name: str):
+        """Remove all cached results for the given procedure"""
+        for key in list(self._entries.keys()):
+            if key[:2] == (api_name, procedure_name):
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
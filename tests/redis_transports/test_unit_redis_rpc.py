@@ -5,8 +5,10 @@ import logging
 import pytest
 
 from lightbus import RedisRpcTransport
+from lightbus.exceptions import UnsupportedOptionValue
 from lightbus.message import RpcMessage
 from lightbus.serializers import BlobMessageSerializer, BlobMessageDeserializer
+from lightbus.transports.redis.rpc import PriorityOrder
 from lightbus.utilities.async_tools import cancel
 
 pytestmark = pytest.mark.unit
@@ -49,6 +51,54 @@ async def test_call_rpc(redis_rpc_transport, redis_client):
     assert await redis_client.ttl("rpc_expiry_key:123abc") == redis_rpc_transport.rpc_timeout
 
 
+@pytest.mark.asyncio
+async def test_call_rpc_with_deadline(redis_rpc_transport, redis_client):
+    """Does call_rpc() skip the expiry key when the message carries a deadline"""
+    rpc_message = RpcMessage(
+        id="123abc",
+        api_name="my.api",
+        procedure_name="my_proc",
+        kwargs={"field": "value"},
+        return_path="abc",
+        deadline=1500000000.5,
+    )
+    await redis_rpc_transport.call_rpc(rpc_message, options={}, bus_client=None)
+    assert set(await redis_client.keys("*")) == {b"my.api:rpc_queue"}
+
+    messages = await redis_client.lrange("my.api:rpc_queue", start=0, stop=100)
+    assert len(messages) == 1
+    message = json.loads(messages[0])
+    assert message["metadata"]["deadline"] == 1500000000.5
+
+
+@pytest.mark.asyncio
+async def test_call_rpcs(redis_rpc_transport, redis_client):
+    """Does call_rpcs() add the messages to the appropriate queues"""
+    rpc_messages = [
+        RpcMessage(
+            id="1", api_name="my.api", procedure_name="my_proc", kwargs={}, deadline=1500000000.5
+        ),
+        RpcMessage(
+            id="2", api_name="my.api", procedure_name="my_proc", kwargs={}, deadline=1500000000.5
+        ),
+        # No deadline, so an expiry key should be created
+        RpcMessage(id="3", api_name="other.api", procedure_name="my_proc", kwargs={}),
+    ]
+    await redis_rpc_transport.call_rpcs(rpc_messages, options={}, bus_client=None)
+    assert set(await redis_client.keys("*")) == {
+        b"my.api:rpc_queue",
+        b"other.api:rpc_queue",
+        b"rpc_expiry_key:3",
+    }
+
+    messages = await redis_client.lrange("my.api:rpc_queue", start=0, stop=100)
+    assert [json.loads(m)["metadata"]["id"] for m in messages] == ["1", "2"]
+
+    messages = await redis_client.lrange("other.api:rpc_queue", start=0, stop=100)
+    assert [json.loads(m)["metadata"]["id"] for m in messages] == ["3"]
+    assert await redis_client.ttl("rpc_expiry_key:3") == redis_rpc_transport.rpc_timeout
+
+
 @pytest.mark.asyncio
 async def test_consume_rpcs_no_expiry_key(redis_client, redis_rpc_transport, dummy_api):
     """Does call_rpc() add a message to a stream, but where the expiry key is missing
@@ -113,6 +163,172 @@ async def test_consume_rpcs(redis_client, redis_rpc_transport, dummy_api):
     assert message.return_path == "abc"
 
 
+@pytest.mark.asyncio
+async def test_consume_rpcs_with_deadline(redis_client, redis_rpc_transport, dummy_api):
+    """Messages with a deadline should be consumed without needing an expiry key
+
+    Checking the deadline itself is left to the bus client.
+    """
+
+    async def co_enqeue():
+        await asyncio.sleep(0.01)
+        return await redis_client.rpush(
+            "my.dummy:rpc_queue",
+            value=json.dumps(
+                {
+                    "metadata": {
+                        "id": "123abc",
+                        "api_name": "my.api",
+                        "procedure_name": "my_proc",
+                        "return_path": "abc",
+                        "deadline": 4000000000.5,
+                    },
+                    "kwargs": {"field": "value"},
+                }
+            ),
+        )
+
+    async def co_consume():
+        return await redis_rpc_transport.consume_rpcs(apis=[dummy_api], bus_client=None)
+
+    enqueue_result, messages = await asyncio.gather(co_enqeue(), co_consume())
+    message = messages[0]
+    assert message.id == "123abc"
+    assert message.deadline == 4000000000.5
+    assert not message.expired
+
+
+@pytest.mark.asyncio
+async def test_consume_rpcs_skip_expired(redis_client, redis_rpc_transport, dummy_api):
+    """Expired messages should be skipped in bulk"""
+    redis_rpc_transport.batch_size = 3
+
+    def make_message(id, deadline):
+        return json.dumps(
+            {
+                "metadata": {
+                    "id": id,
+                    "api_name": "my.api",
+                    "procedure_name": "my_proc",
+                    "return_path": "abc",
+                    "deadline": deadline,
+                },
+                "kwargs": {},
+            }
+        )
+
+    await redis_client.rpush(
+        "my.dummy:rpc_queue",
+        make_message("1", 1500000000.5),
+        make_message("2", 1500000000.5),
+        make_message("3", 1500000000.5),
+        make_message("4", 4000000000.5),
+        make_message("5", 4000000000.5),
+        make_message("6", 4000000000.5),
+    )
+
+    messages = await redis_rpc_transport.consume_rpcs(apis=[dummy_api], bus_client=None)
+    assert [m.id for m in messages] == ["4"]
+
+    # The remaining messages are left in the queue
+    assert await redis_client.llen("my.dummy:rpc_queue") == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_rpc(redis_rpc_transport, redis_client):
+    rpc_message = RpcMessage(
+        id="123abc",
+        api_name="my.api",
+        procedure_name="my_proc",
+        kwargs={"field": "value"},
+        return_path="abc",
+    )
+    await redis_rpc_transport.call_rpc(rpc_message, options={}, bus_client=None)
+    assert set(await redis_client.keys("*")) == {b"my.api:rpc_queue", b"rpc_expiry_key:123abc"}
+
+    await redis_rpc_transport.cancel_rpc(rpc_message, options={}, bus_client=None)
+    assert set(await redis_client.keys("*")) == set()
+
+
+@pytest.mark.asyncio
+async def test_cancel_rpc_no_remove(redis_rpc_transport, redis_client):
+    redis_rpc_transport.remove_cancelled_rpcs = False
+    rpc_message = RpcMessage(
+        id="123abc",
+        api_name="my.api",
+        procedure_name="my_proc",
+        kwargs={"field": "value"},
+        return_path="abc",
+    )
+    await redis_rpc_transport.call_rpc(rpc_message, options={}, bus_client=None)
+    await redis_rpc_transport.cancel_rpc(rpc_message, options={}, bus_client=None)
+    # Message remains, but expiry key is gone so it will not be executed
+    assert set(await redis_client.keys("*")) == {b"my.api:rpc_queue"}
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_priority(redis_rpc_transport, redis_client):
+    rpc_message = RpcMessage(
+        id="123abc",
+        api_name="my.api",
+        procedure_name="my_proc",
+        kwargs={"field": "value"},
+        deadline=4000000000.5,
+    )
+    await redis_rpc_transport.call_rpc(rpc_message, options={"priority": "high"}, bus_client=None)
+    assert set(await redis_client.keys("*")) == {b"my.api:rpc_queue:high"}
+
+    await redis_rpc_transport.cancel_rpc(rpc_message, options={"priority": "high"}, bus_client=None)
+    assert set(await redis_client.keys("*")) == set()
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_unknown_priority(redis_rpc_transport):
+    rpc_message = RpcMessage(api_name="my.api", procedure_name="my_proc", kwargs={})
+    with pytest.raises(UnsupportedOptionValue):
+        await redis_rpc_transport.call_rpc(
+            rpc_message, options={"priority": "urgent"}, bus_client=None
+        )
+
+
+@pytest.mark.asyncio
+async def test_consume_rpcs_priority(redis_rpc_transport, dummy_api):
+    for priority in ("low", "normal", "high"):
+        rpc_message = RpcMessage(
+            id=priority,
+            api_name="my.dummy",
+            procedure_name="my_proc",
+            kwargs={},
+            deadline=4000000000.5,
+        )
+        await redis_rpc_transport.call_rpc(
+            rpc_message, options={"priority": priority}, bus_client=None
+        )
+
+    consumed = []
+    for _ in range(0, 3):
+        messages = await redis_rpc_transport.consume_rpcs(apis=[dummy_api], bus_client=None)
+        consumed.extend(m.id for m in messages)
+
+    assert consumed == ["high", "normal", "low"]
+
+
+def test_get_priority_order_weighted(redis_rpc_transport, mocker):
+    redis_rpc_transport.priority_order = PriorityOrder.WEIGHTED
+    mocker.patch("random.choices", return_value=["low"])
+    assert redis_rpc_transport._get_priority_order() == ["low", "high", "normal"]
+
+
+@pytest.mark.asyncio
+async def test_get_queue_depths(redis_rpc_transport, redis_client):
+    await redis_client.rpush("my.api:rpc_queue:high", "a", "b")
+    await redis_client.rpush("my.api:rpc_queue", "a")
+    assert await redis_rpc_transport.get_queue_depths(["my.api", "other.api"]) == {
+        "my.api": {"high": 2, "normal": 1, "low": 0},
+        "other.api": {"high": 0, "normal": 0, "low": 0},
+    }
+
+
 @pytest.mark.asyncio
 async def test_from_config(redis_client):
     await redis_client.select(5)
@@ -125,6 +341,7 @@ async def test_from_config(redis_client):
         # Non default serializers, event though they wouldn't make sense in this context
         serializer="lightbus.serializers.BlobMessageSerializer",
         deserializer="lightbus.serializers.BlobMessageDeserializer",
+        priority_order="weighted",
     )
     with await transport.connection_manager() as transport_client:
         assert transport_client.connection.address == ("127.0.0.1", port)
@@ -135,6 +352,7 @@ async def test_from_config(redis_client):
     assert transport._redis_pool.connection.maxsize == 123
     assert isinstance(transport.serializer, BlobMessageSerializer)
     assert isinstance(transport.deserializer, BlobMessageDeserializer)
+    assert transport.priority_order == PriorityOrder.WEIGHTED
 
 
 @pytest.mark.asyncio
@@ -1,6 +1,6 @@
 import pytest
 
-from lightbus import Api, Event
+from lightbus import Api, Event, cached, hedged
 from lightbus.api import ApiRegistry
 from lightbus.exceptions import (
     MisconfiguredApiOptions,
@@ -112,3 +112,33 @@ def test_api_registry_names(SimpleApi, registry):
     api = SimpleApi()
     registry.add(api)
     assert registry.names() == ["simple.api"]
+
+
+def test_cached_decorator():
+    class CachedApi(Api):
+        class Meta:
+            name = "cached.api"
+
+        @cached(ttl=60, invalidated_by="user_updated")
+        def my_proc(self):
+            pass
+
+        def uncached_proc(self):
+            pass
+
+    assert CachedApi.my_proc.cache_options.ttl == 60
+    assert CachedApi.my_proc.cache_options.invalidated_by == ("user_updated",)
+    assert not hasattr(CachedApi.uncached_proc, "cache_options")
+
+
+def test_hedged_decorator():
+    class HedgedApi(Api):
+        class Meta:
+            name = "hedged.api"
+
+        @hedged(percentile=90, delay=0.5)
+        def my_proc(self):
+            pass
+
+    assert HedgedApi.my_proc.hedge_options.percentile == 90
+    assert HedgedApi.my_proc.hedge_options.delay == 0.5
@@ -1,5 +1,6 @@
 import asyncio
 import threading
+import time
 from asyncio import BaseEventLoop
 
 import janus
@@ -24,9 +25,12 @@ from lightbus.exceptions import (
     ValidationError,
     SuddenDeathException,
     WorkerDeadlock,
+    LightbusTimeout,
+    LightbusServerError,
 )
 from lightbus.transports.base import TransportRegistry
 from lightbus.utilities.async_tools import cancel, run_user_provided_callable
+from lightbus.utilities.deadlines import deadline_context
 
 pytestmark = pytest.mark.unit
 
@@ -162,6 +166,328 @@ async def test_consume_rpcs_with_transport_error(
     assert result_kwargs["result_message"].trace
 
 
+@pytest.mark.asyncio
+async def test_consume_rpcs_with_transport_expired(
+    mocker, dummy_bus: lightbus.path.BusPath, dummy_api
+):
+    """Calls which have passed their deadline should be dropped without being executed"""
+    dummy_bus.client.register_api(dummy_api)
+    rpc_transport = dummy_bus.client.transport_registry.get_rpc_transport("default")
+
+    expired_message = RpcMessage(
+        api_name="my.dummy",
+        procedure_name="my_proc",
+        kwargs={"field": "x"},
+        return_path="abc",
+        deadline=time.time() - 1,
+    )
+    mocker.patch.object(rpc_transport, "_get_fake_messages", return_value=[expired_message])
+    call_rpc_local = mocker.patch.object(dummy_bus.client, "_call_rpc_local")
+    send_result = mocker.patch.object(dummy_bus.client, "send_result")
+
+    task = asyncio.ensure_future(
+        dummy_bus.client._consume_rpcs_with_transport(rpc_transport=rpc_transport, apis=[])
+    )
+    await asyncio.sleep(0.2)
+    await cancel(task)
+
+    assert not call_rpc_local.called
+    assert not send_result.called
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_inherits_deadline(
+    mocker, dummy_bus: lightbus.path.BusPath, dummy_api
+):
+    """Nested RPC calls should be given the remaining time of the current call"""
+    dummy_bus.client.register_api(dummy_api)
+    call_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("my.dummy"), "call_rpc"
+    )
+
+    deadline = time.time() + 5
+    with deadline_context(deadline):
+        await dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+
+    (rpc_message,), _ = call_rpc_spy.call_args
+    assert rpc_message.deadline == deadline
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_deadline_passed(dummy_bus: lightbus.path.BusPath, dummy_api):
+    """Nested RPC calls should not be made at all if the current call's deadline has passed"""
+    dummy_bus.client.register_api(dummy_api)
+
+    with deadline_context(time.time() - 1):
+        with pytest.raises(LightbusTimeout):
+            await dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+
+
+@pytest.fixture()
+def cached_api():
+    class CachedApi(lightbus.Api):
+        user_updated = lightbus.Event()
+
+        class Meta:
+            name = "cached.api"
+
+        @lightbus.cached(ttl=60, invalidated_by="user_updated")
+        def get_permissions(self, username):
+            pass
+
+    return CachedApi()
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_cached(mocker, dummy_bus: lightbus.path.BusPath, cached_api):
+    dummy_bus.client.register_api(cached_api)
+    call_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("cached.api"), "call_rpc"
+    )
+
+    result1 = await dummy_bus.client.call_rpc_remote(
+        "cached.api", "get_permissions", kwargs={"username": "adam"}
+    )
+    result2 = await dummy_bus.client.call_rpc_remote(
+        "cached.api", "get_permissions", kwargs={"username": "adam"}
+    )
+    assert result1 == result2 == "Fake result"
+    assert call_rpc_spy.call_count == 1
+    assert dummy_bus.client.rpc_cache.hits == 1
+    assert dummy_bus.client.rpc_cache.misses == 1
+
+    # Different arguments, so a different cache entry
+    await dummy_bus.client.call_rpc_remote(
+        "cached.api", "get_permissions", kwargs={"username": "sally"}
+    )
+    assert call_rpc_spy.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_not_cached(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    dummy_bus.client.register_api(dummy_api)
+    call_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("my.dummy"), "call_rpc"
+    )
+
+    await dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+    await dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+    assert call_rpc_spy.call_count == 2
+    assert len(dummy_bus.client.rpc_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_cache_invalidated(
+    mocker, dummy_bus: lightbus.path.BusPath, cached_api
+):
+    dummy_bus.client.register_api(cached_api)
+    event_transport = dummy_bus.client.transport_registry.get_event_transport("cached.api")
+    mocker.patch.object(
+        event_transport,
+        "_get_fake_message",
+        return_value=EventMessage(api_name="cached.api", event_name="user_updated", kwargs={}),
+    )
+
+    await dummy_bus.client.call_rpc_remote(
+        "cached.api", "get_permissions", kwargs={"username": "adam"}
+    )
+    assert len(dummy_bus.client.rpc_cache) == 1
+
+    # The debug event transport will soon provide a fake user_updated event
+    await asyncio.sleep(0.2)
+    assert len(dummy_bus.client.rpc_cache) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("coalesce_rpcs,expected_calls", [(True, 1), (False, 3)])
+async def test_call_rpc_remote_coalesced(
+    mocker, dummy_bus: lightbus.path.BusPath, dummy_api, coalesce_rpcs, expected_calls
+):
+    dummy_bus.client.register_api(dummy_api)
+    dummy_bus.client.config.api("default").coalesce_rpcs = coalesce_rpcs
+    call_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("my.dummy"), "call_rpc"
+    )
+
+    # Calls can only be concurrent when made from within the worker thread
+    @run_in_worker_thread(worker=dummy_bus.client.worker)
+    async def call_concurrently():
+        return await asyncio.gather(
+            *[
+                dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+                for _ in range(0, 3)
+            ]
+        )
+
+    results = await call_concurrently()
+    assert results == ["Fake result", "Fake result", "Fake result"]
+    assert call_rpc_spy.call_count == expected_calls
+    assert not dummy_bus.client._rpc_calls_in_flight
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_coalesced_error(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    """All coalesced callers should receive the error"""
+    dummy_bus.client.register_api(dummy_api)
+    dummy_bus.client.config.api("default").coalesce_rpcs = True
+    result_transport = dummy_bus.client.transport_registry.get_result_transport("my.dummy")
+
+    async def receive_result(rpc_message, *args, **kwargs):
+        await asyncio.sleep(0.05)
+        return ResultMessage(result="Oh no", error=True, rpc_message_id=rpc_message.id)
+
+    mocker.patch.object(result_transport, "receive_result", side_effect=receive_result)
+
+    @run_in_worker_thread(worker=dummy_bus.client.worker)
+    async def call_concurrently():
+        return await asyncio.gather(
+            *[
+                dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+                for _ in range(0, 3)
+            ],
+            return_exceptions=True,
+        )
+
+    results = await call_concurrently()
+    assert all(isinstance(result, LightbusServerError) for result in results)
+    assert result_transport.receive_result.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_call_rpcs_remote(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    dummy_bus.client.register_api(dummy_api)
+    rpc_transport = dummy_bus.client.transport_registry.get_rpc_transport("my.dummy")
+    result_transport = dummy_bus.client.transport_registry.get_result_transport("my.dummy")
+    call_rpcs_spy = mocker.spy(rpc_transport, "call_rpcs")
+
+    async def receive_result(rpc_message, *args, **kwargs):
+        if rpc_message.kwargs["field"] == "error":
+            return ResultMessage(result="Oh no", error=True, rpc_message_id=rpc_message.id)
+        else:
+            return ResultMessage(result=rpc_message.kwargs["field"], rpc_message_id=rpc_message.id)
+
+    mocker.patch.object(result_transport, "receive_result", side_effect=receive_result)
+
+    results = await dummy_bus.client.call_rpcs_remote(
+        [
+            ("my.dummy", "my_proc", {"field": "a"}),
+            ("my.dummy", "my_proc", {"field": "error"}),
+            ("my.dummy", "my_proc", {"field": "c"}),
+        ]
+    )
+    assert results[0] == "a"
+    assert isinstance(results[1], LightbusServerError)
+    assert results[2] == "c"
+
+    # All messages sent in one go
+    assert call_rpcs_spy.call_count == 1
+    (rpc_messages,), _ = call_rpcs_spy.call_args
+    assert [m.kwargs["field"] for m in rpc_messages] == ["a", "error", "c"]
+
+
+@pytest.mark.asyncio
+async def test_call_rpcs_remote_timeout(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    dummy_bus.client.register_api(dummy_api)
+    result_transport = dummy_bus.client.transport_registry.get_result_transport("my.dummy")
+
+    async def receive_result(rpc_message, *args, **kwargs):
+        if rpc_message.kwargs["field"] == "slow":
+            await asyncio.sleep(1)
+        return ResultMessage(result=rpc_message.kwargs["field"], rpc_message_id=rpc_message.id)
+
+    mocker.patch.object(result_transport, "receive_result", side_effect=receive_result)
+
+    results = await dummy_bus.client.call_rpcs_remote(
+        [("my.dummy", "my_proc", {"field": "slow"}), ("my.dummy", "my_proc", {"field": "fast"})],
+        options={"timeout": 0.1},
+    )
+    assert isinstance(results[0], LightbusTimeout)
+    assert results[1] == "fast"
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_timeout_cancels(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    dummy_bus.client.register_api(dummy_api)
+    cancel_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("my.dummy"), "cancel_rpc"
+    )
+
+    # The debug transport takes 100ms to provide a result
+    with pytest.raises(LightbusTimeout):
+        await dummy_bus.client.call_rpc_remote(
+            "my.dummy", "my_proc", kwargs={"field": "x"}, options={"timeout": 0.01}
+        )
+    assert cancel_rpc_spy.call_count == 1
+
+
+@pytest.fixture()
+def hedged_api():
+    class HedgedApi(lightbus.Api):
+        class Meta:
+            name = "hedged.api"
+
+        @lightbus.hedged(percentile=50, delay=0.05)
+        def get_user(self, username):
+            pass
+
+    return HedgedApi()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("receive_delay,expected_calls", [(0.2, 2), (0.01, 1)])
+async def test_call_rpc_remote_hedged(
+    mocker, dummy_bus: lightbus.path.BusPath, hedged_api, receive_delay, expected_calls
+):
+    dummy_bus.client.register_api(hedged_api)
+    rpc_transport = dummy_bus.client.transport_registry.get_rpc_transport("hedged.api")
+    call_rpc_spy = mocker.spy(rpc_transport, "call_rpc")
+    cancel_rpc_spy = mocker.spy(rpc_transport, "cancel_rpc")
+    result_transport = dummy_bus.client.transport_registry.get_result_transport("hedged.api")
+
+    async def receive_result(rpc_message, *args, **kwargs):
+        await asyncio.sleep(receive_delay)
+        return ResultMessage(result="Result", rpc_message_id=rpc_message.id)
+
+    mocker.patch.object(result_transport, "receive_result", side_effect=receive_result)
+
+    result = await dummy_bus.client.call_rpc_remote(
+        "hedged.api", "get_user", kwargs={"username": "adam"}
+    )
+    assert result == "Result"
+    assert call_rpc_spy.call_count == expected_calls
+    # Only the duplicate call should need cancelling
+    assert cancel_rpc_spy.call_count == expected_calls - 1
+
+    # Duplicate calls should be identical to the original
+    messages = [args[0] for args, _ in call_rpc_spy.call_args_list]
+    assert len({m.id for m in messages}) == 1
+    assert len(dummy_bus.client._rpc_latencies[("hedged.api", "get_user")]) == 1
+
+
+@pytest.mark.asyncio
+async def test_call_rpc_remote_not_hedged(mocker, dummy_bus: lightbus.path.BusPath, dummy_api):
+    dummy_bus.client.register_api(dummy_api)
+    call_rpc_spy = mocker.spy(
+        dummy_bus.client.transport_registry.get_rpc_transport("my.dummy"), "call_rpc"
+    )
+
+    # The debug transport takes 100ms to provide a result
+    await dummy_bus.client.call_rpc_remote("my.dummy", "my_proc", kwargs={"field": "x"})
+    assert call_rpc_spy.call_count == 1
+
+
+def test_get_hedge_delay(dummy_bus: lightbus.path.BusPath, hedged_api):
+    hedge_options = hedged_api.get_user.hedge_options
+    client = dummy_bus.client
+
+    # Not enough data, so use the default delay
+    client._rpc_latencies[("hedged.api", "get_user")].extend([1.0] * 5)
+    assert client._get_hedge_delay("hedged.api", "get_user", hedge_options) == 0.05
+
+    client._rpc_latencies[("hedged.api", "get_user")].extend([i / 100 for i in range(0, 95)])
+    assert client._get_hedge_delay("hedged.api", "get_user", hedge_options) == 0.5
+
+
 @pytest.mark.asyncio
 async def test_listen_for_event_empty_name(dummy_bus: lightbus.path.BusPath):
     with pytest.raises(InvalidName):
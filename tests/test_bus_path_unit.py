@@ -52,6 +52,19 @@ async def test_positional_only_rpc(dummy_bus: lightbus.path.BusPath):
         await dummy_bus.my.dummy.my_proc.call_async(123)
 
 
+@pytest.mark.asyncio
+async def test_call_many_async(dummy_bus: lightbus.path.BusPath, dummy_api, mocker):
+    dummy_bus.client.register_api(dummy_api)
+    call_rpcs_remote = mocker.spy(dummy_bus.client, "call_rpcs_remote")
+
+    results = await dummy_bus.my.dummy.my_proc.call_many_async([{"field": 1}, {"field": 2}])
+    assert results == ["Fake result", "Fake result"]
+    assert call_rpcs_remote.call_args[1]["calls"] == [
+        ("my.dummy", "my_proc", {"field": 1}),
+        ("my.dummy", "my_proc", {"field": 2}),
+    ]
+
+
 @pytest.mark.asyncio
 async def test_positional_only_event(dummy_bus: lightbus.path.BusPath):
     with pytest.raises(InvalidParameters):
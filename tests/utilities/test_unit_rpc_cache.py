@@ -0,0 +1,73 @@
+import pytest
+
+from lightbus.utilities.rpc_cache import RpcResultCache
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture()
+def cache():
+    return RpcResultCache(max_size=3)
+
+
+def test_make_key_canonical():
+    key1 = RpcResultCache.make_key("my.api", "my_proc", {"a": 1, "b": [1, 2]})
+    key2 = RpcResultCache.make_key("my.api", "my_proc", {"b": [1, 2], "a": 1})
+    assert key1 == key2
+
+
+def test_make_key_differs():
+    key1 = RpcResultCache.make_key("my.api", "my_proc", {"a": 1})
+    key2 = RpcResultCache.make_key("my.api", "my_proc", {"a": 2})
+    assert key1 != key2
+
+
+def test_get_miss(cache):
+    with pytest.raises(KeyError):
+        cache.get(("my.api", "my_proc", "{}"))
+    assert cache.misses == 1
+    assert cache.hits == 0
+
+
+def test_get_hit(cache):
+    cache.set(("my.api", "my_proc", "{}"), None, ttl=10)
+    assert cache.get(("my.api", "my_proc", "{}")) is None
+    assert cache.hits == 1
+    assert cache.misses == 0
+
+
+def test_get_expired(cache):
+    cache.set(("my.api", "my_proc", "{}"), "value", ttl=-1)
+    with pytest.raises(KeyError):
+        cache.get(("my.api", "my_proc", "{}"))
+    assert cache.misses == 1
+    assert len(cache) == 0
+
+
+def test_get_returns_copy(cache):
+    cache.set(("my.api", "my_proc", "{}"), {"a": [1]}, ttl=10)
+    cache.get(("my.api", "my_proc", "{}"))["a"].append(2)
+    assert cache.get(("my.api", "my_proc", "{}")) == {"a": [1]}
+
+
+def test_least_recently_used_evicted(cache):
+    cache.set(("my.api", "my_proc", "1"), 1, ttl=10)
+    cache.set(("my.api", "my_proc", "2"), 2, ttl=10)
+    cache.set(("my.api", "my_proc", "3"), 3, ttl=10)
+    cache.get(("my.api", "my_proc", "1"))
+    cache.set(("my.api", "my_proc", "4"), 4, ttl=10)
+
+    assert len(cache) == 3
+    assert cache.get(("my.api", "my_proc", "1")) == 1
+    with pytest.raises(KeyError):
+        cache.get(("my.api", "my_proc", "2"))
+
+
+def test_invalidate(cache):
+    cache.set(("my.api", "my_proc", "1"), 1, ttl=10)
+    cache.set(("my.api", "my_proc", "2"), 2, ttl=10)
+    cache.set(("my.api", "other_proc", "1"), 3, ttl=10)
+    cache.invalidate("my.api", "my_proc")
+
+    assert len(cache) == 1
+    assert cache.get(("my.api", "other_proc", "1")) == 3